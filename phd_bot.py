@@ -4,35 +4,94 @@ PhD Application AutoPilot - Secure Version
 A privacy-focused, secure automation system for PhD applications
 """
 
-import feedparser
-import requests
+import asyncio
+import aiohttp
 import json
-import pandas as pd
-import time
+import csv
 import random
 from datetime import datetime
 from bs4 import BeautifulSoup
 import os
 import hashlib
+import functools
+import heapq
+import sqlite3
+import contextlib
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+# Prefer the lxml-backed parser; it exposes the same entry API as feedparser
+try:
+    import fastfeedparser as feedparser
+except ImportError:
+    import feedparser
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Entry fields used for scoring and kept in the feed cache
+ENTRY_FIELDS = ['title', 'link', 'summary', 'description', 'published']
+
+def parse_feed_entries(body):
+    """Parse feed bytes into JSON-friendly entry dicts"""
+    return [
+        {field: entry.get(field) for field in ENTRY_FIELDS if entry.get(field) is not None}
+        for entry in feedparser.parse(body).entries
+    ]
 
 class SecurePhDBot:
     def __init__(self, config_path=None):
         self.opportunities = []
+        self.scan_started = datetime.now().isoformat()
         self.config = self.load_config(config_path)
+        self.build_keyword_matcher()
         self.setup_secure_environment()
     
+    def build_keyword_matcher(self):
+        """Compile the relevance keywords once per run"""
+        # A single automaton pass reports every keyword in the text
+        self._kw_automaton = None
+        if ahocorasick is not None and self._all_kw:
+            self._kw_automaton = ahocorasick.Automaton()
+            for keyword in self._all_kw:
+                self._kw_automaton.add_word(keyword, keyword)
+            self._kw_automaton.make_automaton()
+        
+        # Scores only depend on the text and these keywords, so repeated
+        # entries are memoised; rebuilding the matcher starts a fresh cache
+        self._score_cached = functools.lru_cache(maxsize=4096)(self.score_text)
+    
     def setup_secure_environment(self):
         """Set up secure working environment"""
         # Create secure directories
         os.makedirs('data', exist_ok=True)
         os.makedirs('output', exist_ok=True)
+        os.makedirs('data/feeds', exist_ok=True)
         
         # Security headers for web requests
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Academic Research Bot (https://github.com/username/PhD-Application-AutoPilot)',
-            'Accept': 'application/rss+xml, application/atom+xml, application/xml, text/xml'
-        })
+            'Accept': 'application/rss+xml, application/atom+xml, application/xml, text/xml',
+            # Feed XML compresses well; only advertise br when it can be decoded
+            'Accept-Encoding': 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+        }
     
     def load_config(self, config_path):
         """Load configuration securely"""
@@ -65,26 +124,54 @@ class SecurePhDBot:
         # Load user config if provided
         if config_path and os.path.exists(config_path):
             try:
-                with open(config_path, 'r') as f:
-                    user_config = json.load(f)
+                with open(config_path, 'rb') as f:
+                    user_config = _loads(f.read())
                     # Deep merge with default config
                     self.deep_merge(default_config, user_config)
             except Exception as e:
                 print(f"⚠️  Config load error: {e}. Using defaults.")
         
+        # Values read on every entry are derived once here
+        self._min_rel = default_config['scanning']['min_relevance_score']
+        
+        # Generic academic keywords (not user-specific)
+        self._academic_kw = [
+            'phd', 'doctoral', 'research', 'graduate', 'assistant',
+            'funded', 'scholarship', 'fellowship', 'studentship'
+        ]
+        # Field-specific keywords and technical skills from config (not personal data)
+        self._field_kw = [kw.lower() for kw in default_config['user_profile']['research_interests']]
+        self._tech_kw = [
+            skill.lower()
+            for category in default_config['user_profile']['technical_skills'].values()
+            for skill in category
+        ]
+        # De-duplicated so every matcher and _max_kw agree on the keyword set
+        self._all_kw = tuple(dict.fromkeys(self._academic_kw + self._field_kw + self._tech_kw))
+        self._max_kw = len(self._all_kw)
+        
         return default_config
     
     def deep_merge(self, base, update):
         """Safely merge configurations"""
-        for key, value in update.items():
-            if isinstance(value, dict) and key in base and isinstance(base[key], dict):
-                self.deep_merge(base[key], value)
-            else:
-                base[key] = value
+        # Iterative so deeply nested user configs cannot hit the recursion limit;
+        # configs are plain JSON dicts, so exact type checks are enough
+        stack = [(base, update)]
+        while stack:
+            base_dict, update_dict = stack.pop()
+            for key, value in update_dict.items():
+                base_value = base_dict.get(key)
+                if type(value) is dict and type(base_value) is dict:
+                    stack.append((base_value, value))
+                else:
+                    base_dict[key] = value
     
     def scan_opportunities(self):
         """Scan for PhD opportunities securely"""
         print("🔍 Scanning for PhD opportunities...")
+        # One timestamp for the whole scan instead of per entry
+        now_iso = datetime.now().isoformat()
+        self.scan_started = now_iso
         
         # Use only public, academic RSS feeds
         rss_feeds = [
@@ -98,82 +185,233 @@ class SecurePhDBot:
             "https://career.stanford.edu/feed/",
         ]
         
-        for feed_url in rss_feeds:
+        feeds = self.fetch_feeds(rss_feeds)
+        
+        # Bind config values and methods once, outside the per-entry loops
+        max_entries = self.config['scanning']['max_entries_per_feed']
+        log_sensitive = self.config['privacy']['log_sensitive_data']
+        process = self.process_opportunity
+        ops_append = self.opportunities.append
+        
+        # The same posting can appear in several feeds (and in earlier scans)
+        seen_ids = {opp['id'] for opp in self.opportunities}
+        
+        for feed_url, entries in feeds:
             try:
                 print(f"  Checking: {self.hash_url(feed_url)}")
                 
-                # Add delay to be respectful to servers
-                time.sleep(self.config['scanning']['request_delay'])
-                
-                feed = feedparser.parse(feed_url)
+                if isinstance(entries, Exception):
+                    raise entries
                 
-                for entry in feed.entries[:self.config['scanning']['max_entries_per_feed']]:
-                    opportunity = self.process_opportunity(entry, feed_url)
-                    if opportunity and opportunity['relevance'] >= self.config['scanning']['min_relevance_score']:
-                        self.opportunities.append(opportunity)
+                for entry in entries[:max_entries]:
+                    opportunity = process(entry, feed_url, now_iso)
+                    if opportunity and opportunity['id'] not in seen_ids:
+                        seen_ids.add(opportunity['id'])
+                        ops_append(opportunity)
                         
             except Exception as e:
-                if self.config['privacy']['log_sensitive_data']:
+                if log_sensitive:
                     print(f"    ❌ Error with feed: {e}")
                 else:
                     print(f"    ❌ Error with feed: {self.hash_url(feed_url)}")
+        
+        self.store_opportunities(self.opportunities)
+    
+    def store_opportunities(self, opportunities):
+        """Upsert opportunities, keeping when each was first seen"""
+        rows = [
+            (opp['id'], opp['title'], opp['link'], opp['summary'], opp['published'],
+             opp['relevance'], opp['source'], self.scan_started, self.scan_started)
+            for opp in opportunities
+        ]
+        # Opportunities persist across runs, keyed by their hashed ID. The
+        # connection only lives for this call, and the whole scan is one
+        # transaction since per-row commits dominate otherwise
+        with contextlib.closing(sqlite3.connect('data/opportunities.sqlite')) as db, db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS opp (
+                    id TEXT PRIMARY KEY,
+                    title TEXT,
+                    link TEXT,
+                    summary TEXT,
+                    published TEXT,
+                    relevance REAL,
+                    source TEXT,
+                    first_seen TEXT,
+                    last_seen TEXT
+                )
+            """)
+            db.executemany("""
+                INSERT INTO opp (id, title, link, summary, published, relevance,
+                                 source, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    link = excluded.link,
+                    summary = excluded.summary,
+                    published = excluded.published,
+                    relevance = excluded.relevance,
+                    source = excluded.source,
+                    last_seen = excluded.last_seen
+            """, rows)
+    
+    def fetch_feeds(self, urls):
+        """Run the async fetcher, also from inside a running event loop"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._fetch_all(urls))
+        
+        # Notebooks (e.g. Colab) already run an event loop in this thread,
+        # so give the fetcher its own loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self._fetch_all(urls)).result()
+    
+    async def _fetch_all(self, urls):
+        """Fetch all feeds concurrently, returning (url, entries or exception) pairs"""
+        # Pooled keep-alive connections are reused for every feed on a host
+        connector = aiohttp.TCPConnector(limit=10, limit_per_host=2)
+        timeout = aiohttp.ClientTimeout(total=10)
+        # One semaphore per host keeps the request delay polite without
+        # serialising feeds that live on different servers
+        self._host_locks = {urlsplit(url).netloc: asyncio.Semaphore(1) for url in urls}
+        self._feed_cache = self.load_feed_cache()
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers=self.headers) as session:
+            delay = self.config['scanning']['request_delay']
+            feeds = await asyncio.gather(*[self._fetch_one(session, url, delay) for url in urls],
+                                         return_exceptions=True)
+        
+        self.save_feed_cache(self._feed_cache)
+        return list(zip(urls, feeds))
+    
+    async def _fetch_one(self, session, url, delay):
+        """Download a single feed, reusing the cached entries if it is unchanged"""
+        cached = self._feed_cache.get(url, {})
+        headers = {}
+        if os.path.exists(cached.get('entries_path', '')):
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        async with self._host_locks[urlsplit(url).netloc]:
+            status, body, response_headers = await self._get(session, url, headers)
+            if status == 304:
+                try:
+                    with open(cached['entries_path'], 'rb') as f:
+                        return _loads(f.read())
+                except Exception:
+                    # Unreadable cache: forget it and fetch the full feed without validators
+                    self._feed_cache.pop(url, None)
+                    status, body, response_headers = await self._get(session, url, {})
+            
+            etag = response_headers.get('ETag')
+            last_modified = response_headers.get('Last-Modified')
+            # Add delay to be respectful to servers
+            await asyncio.sleep(delay)
+        
+        # Parse in the default thread pool so other downloads keep going; a
+        # process pool costs more to start than these feeds take to parse
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(None, parse_feed_entries, body)
+        
+        # Store plain entry fields so a 304 can skip the download and the parse
+        entries_path = f"data/feeds/{self.hash_data(url)}.json"
+        self.write_atomic(entries_path, _dumps(entries))
+        self._feed_cache[url] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'entries_path': entries_path
+        }
+        
+        return entries
+    
+    async def _get(self, session, url, headers, retries=2, backoff=0.3):
+        """GET over the pooled session, retrying connection errors, timeouts and 5xx responses"""
+        for attempt in range(retries + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status < 500 or attempt == retries:
+                        if response.status != 304:
+                            response.raise_for_status()
+                        return response.status, await response.read(), response.headers
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == retries:
+                    raise
+            await asyncio.sleep(backoff * (2 ** attempt))
     
-    def process_opportunity(self, entry, source):
-        """Process and score an opportunity"""
+    def load_feed_cache(self):
+        """Load stored ETag/Last-Modified validators for each feed"""
+        if os.path.exists('data/feed_cache.json'):
+            try:
+                with open('data/feed_cache.json', 'rb') as f:
+                    return _loads(f.read())
+            except Exception as e:
+                print(f"⚠️  Feed cache load error: {e}. Refetching all feeds.")
+        return {}
+    
+    def save_feed_cache(self, cache):
+        """Persist feed validators for the next run"""
+        self.write_atomic('data/feed_cache.json', _dumps(cache))
+    
+    def write_atomic(self, path, data):
+        """Write bytes via a temp file so readers never see a partial file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def process_opportunity(self, entry, source, now_iso=None):
+        """Process and score an opportunity, or return None if it is not relevant"""
         # Extract basic info
         title = entry.get('title', 'Unknown Title')
-        link = entry.get('link', '')
         summary = entry.get('summary', entry.get('description', ''))
         
         # Calculate relevance
         relevance = self.calculate_relevance(title + " " + summary)
         
+        # Skip hashing and building the record for entries that get filtered out
+        if relevance < self._min_rel:
+            return None
+        
+        link = entry.get('link', '')
+        
         # Apply privacy measures
-        if self.config['privacy']['hash_identifiers']:
-            opportunity_id = self.hash_data(title + link)
-        else:
-            opportunity_id = hashlib.md5((title + link).encode()).hexdigest()[:8]
+        opportunity_id = self.hash_data(title + link)
+        
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
         
         return {
             'id': opportunity_id,
             'title': title,
             'link': link,
             'summary': summary[:200] + '...' if len(summary) > 200 else summary,
-            'published': entry.get('published', datetime.now().isoformat()),
+            'published': entry.get('published', now_iso),
             'source': self.hash_url(source),
             'relevance': relevance,
-            'processed_date': datetime.now().isoformat()
+            'processed_date': now_iso
         }
     
     def calculate_relevance(self, text):
         """Calculate relevance score without exposing personal data"""
+        return self._score_cached(text)
+    
+    def score_text(self, text):
+        """Score text against the compiled keywords (uncached)"""
         text_lower = text.lower()
         
-        # Generic academic keywords (not user-specific)
-        academic_keywords = [
-            'phd', 'doctoral', 'research', 'graduate', 'assistant',
-            'funded', 'scholarship', 'fellowship', 'studentship'
-        ]
-        
-        # Field-specific keywords from config (not personal data)
-        field_keywords = self.config['user_profile']['research_interests']
-        field_keywords_lower = [kw.lower() for kw in field_keywords]
-        
-        # Technical skills from config
-        tech_skills = []
-        for category in self.config['user_profile']['technical_skills'].values():
-            tech_skills.extend([skill.lower() for skill in category])
-        
-        all_keywords = academic_keywords + field_keywords_lower + tech_skills
-        
-        # Calculate score
-        score = 0
-        for keyword in all_keywords:
-            if keyword in text_lower:
-                score += 1
+        # Calculate score (each keyword counts once)
+        if self._kw_automaton is not None:
+            score = len({keyword for _, keyword in self._kw_automaton.iter(text_lower)})
+        else:
+            # Substring checks, so keywords inside other keywords still count
+            score = sum(1 for keyword in self._all_kw if keyword in text_lower)
         
         # Normalize and return
-        max_possible_score = len(all_keywords)
+        max_possible_score = self._max_kw
         return min(score / max_possible_score * 1.5, 1.0) if max_possible_score > 0 else 0
     
     def generate_cover_letter_template(self, opportunity):
@@ -243,45 +481,55 @@ Best regards,
             print("📊 No opportunities found to display.")
             return None
         
-        # Sort by relevance
-        self.opportunities.sort(key=lambda x: x['relevance'], reverse=True)
-        
-        # Create DataFrame for dashboard
+        # Build dashboard rows and relevance buckets in a single pass
         dashboard_data = []
+        high = medium = low = 0
         for opp in self.opportunities:
+            score = round(opp['relevance'], 3)
             dashboard_data.append({
                 'ID': opp['id'],
                 'Title': opp['title'],
-                'Relevance_Score': round(opp['relevance'], 3),
+                'Relevance_Score': score,
                 'Source': opp['source'],
                 'Published': opp['published'][:10] if opp['published'] else 'Unknown',
                 'Status': 'Not Applied'
             })
-        
-        df = pd.DataFrame(dashboard_data)
+            high += score > 0.7
+            medium += 0.5 <= score <= 0.7
+            low += score < 0.5
         
         # Display summary
         print(f"\n📊 OPPORTUNITY DASHBOARD")
         print("=" * 60)
-        print(f"Total Opportunities Found: {len(df)}")
-        print(f"High Relevance (>0.7): {len(df[df['Relevance_Score'] > 0.7])}")
-        print(f"Medium Relevance (0.5-0.7): {len(df[(df['Relevance_Score'] >= 0.5) & (df['Relevance_Score'] <= 0.7)])}")
-        print(f"Low Relevance (<0.5): {len(df[df['Relevance_Score'] < 0.5])}")
+        print(f"Total Opportunities Found: {len(dashboard_data)}")
+        print(f"High Relevance (>0.7): {high}")
+        print(f"Medium Relevance (0.5-0.7): {medium}")
+        print(f"Low Relevance (<0.5): {low}")
         
+        # Only the top five are shown, so avoid sorting everything
+        top = heapq.nlargest(5, dashboard_data, key=lambda x: x['Relevance_Score'])
+        title_width = max(len('Title'), *(len(row['Title']) for row in top))
+        row_format = f"{{:<{title_width}}}  {{:>15}}  {{}}"
         print(f"\n🎯 TOP OPPORTUNITIES:")
-        print(df[['Title', 'Relevance_Score', 'Source']].head(5).to_string(index=False))
+        print(row_format.format('Title', 'Relevance_Score', 'Source'))
+        for row in top:
+            print(row_format.format(row['Title'], row['Relevance_Score'], row['Source']))
         
         # Save to file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"output/opportunities_dashboard_{timestamp}.csv"
-        df.to_csv(filename, index=False)
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(dashboard_data[0]))
+            writer.writeheader()
+            writer.writerows(dashboard_data)
         print(f"\n💾 Dashboard saved: {filename}")
         
-        return df
+        return dashboard_data
     
     def hash_data(self, data):
         """Hash sensitive data for privacy"""
-        return hashlib.md5(data.encode()).hexdigest()[:12]
+        # 6-byte digest gives the same 12 hex characters without slicing
+        return hashlib.blake2b(data.encode(), digest_size=6).hexdigest()
     
     def hash_url(self, url):
         """Hash URL for privacy while maintaining usefulness"""
@@ -310,7 +558,7 @@ Best regards,
             
             # Generate sample cover letter if opportunities found
             if self.opportunities:
-                sample_opp = self.opportunities[0]
+                sample_opp = max(self.opportunities, key=lambda x: x['relevance'])
                 cover_letter = self.generate_cover_letter_template(sample_opp)
                 
                 # Save sample cover letter